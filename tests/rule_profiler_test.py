@@ -0,0 +1,40 @@
+import json
+
+from user_monitoring.Class.rule_profiler import RULES, RuleProfiler
+
+
+def test_build_history_is_deterministic():
+    end_time = RuleProfiler.build_history(1)[0]["created_at"]
+    first = RuleProfiler.build_history(50, seed=3, end_time=end_time)
+    second = RuleProfiler.build_history(50, seed=3, end_time=end_time)
+    assert first == second
+    assert [event["id"] for event in first] == list(range(1, 51))
+
+
+def test_replay_appends_event_before_running_rules():
+    stream = RuleProfiler.build_event_stream(5)
+    seen = []
+    RuleProfiler.replay(
+        stream,
+        [],
+        ["consecutive_withdrawals"],
+        lambda name, rule, args: seen.append(len(args[0])),
+    )
+    assert seen == [1, 2, 3, 4, 5]
+
+
+def test_run_writes_profiles(tmp_path):
+    stream = RuleProfiler.build_event_stream(10)
+    history = RuleProfiler.build_history(20)
+    summary = RuleProfiler.run(stream, history, list(RULES), [10, 100], str(tmp_path), repeat=1)
+
+    assert set(summary["rules"]) == set(RULES)
+    assert summary["rules"]["consecutive_deposits"]["calls"] == 10
+    for name in RULES:
+        assert (tmp_path / f"{name}.prof").exists()
+        for line in (tmp_path / f"{name}.time.folded").read_text().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert stack.startswith(name)
+            assert int(count) > 0
+    assert json.loads((tmp_path / "summary.json").read_text()) == summary
+    assert len((tmp_path / "scaling.csv").read_text().splitlines()) == 1 + 2 * len(RULES)
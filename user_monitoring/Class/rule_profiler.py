@@ -0,0 +1,513 @@
+import argparse
+import contextlib
+import cProfile
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from user_monitoring.Class.user_events import UserEvents
+
+# Profiles the alert rules from UserEvents without Flask or SQLite.
+# The rules only need the event dict and the list of history dicts that
+# get_user_events would return, so both are built in memory here.
+#
+# Run with:
+#   python -m user_monitoring.Class.rule_profiler --output profile_output
+
+
+class Rule(NamedTuple):
+    func: Callable
+    args: Callable
+    applies: Callable
+
+
+# Mirrors the order and conditions used in UserEvents.get_Alerts
+RULES = {
+    "withdrawal_greater_than_hundred": Rule(
+        UserEvents.withdrawal_greater_than_hundred,
+        lambda event, history: (event,),
+        lambda event: True,
+    ),
+    "consecutive_withdrawals": Rule(
+        UserEvents.consecutive_withdrawals,
+        lambda event, history: (history,),
+        lambda event: True,
+    ),
+    "consecutive_deposits": Rule(
+        UserEvents.consecutive_deposits,
+        lambda event, history: (history,),
+        lambda event: True,
+    ),
+    "check_deposit_amount_within_time": Rule(
+        UserEvents.check_deposit_amount_within_time,
+        lambda event, history: (history,),
+        lambda event: event["type"] == "deposit",
+    ),
+}
+
+DEFAULT_LENGTHS = [10, 100, 1000, 10000, 100000]
+
+
+class RuleProfiler:
+    @staticmethod
+    def build_event_stream(length, seed=0):
+        """
+        Build a deterministic stream of API event payloads.
+
+        Args:
+            length (int): The number of events in the stream.
+            seed (int): The seed for the random generator.
+
+        Returns:
+            list: A list of event payload dictionaries like the ones posted to /event.
+        """
+        rng = random.Random(seed)
+        return [
+            {
+                "type": "deposit" if rng.random() < 0.6 else "withdraw",
+                "amount": round(rng.uniform(1, 200), 2),
+                "user_id": 1,
+                "time": index,
+            }
+            for index in range(length)
+        ]
+
+    @staticmethod
+    def load_event_stream(path):
+        """
+        Load a recorded event stream from a JSON file.
+
+        Args:
+            path (str): Path to a JSON file containing a list of event payloads.
+
+        Returns:
+            list: A list of event payload dictionaries.
+        """
+        with open(path) as file:
+            events = json.load(file)
+        for event_data in events:
+            is_valid, missing_fields = UserEvents.validate_event_data(event_data)
+            if not is_valid:
+                raise ValueError(f"Recorded event missing fields: {', '.join(missing_fields)}")
+        return events
+
+    @staticmethod
+    def to_history_event(event_data, event_id, created_at):
+        """
+        Convert an event payload into the dictionary shape returned by get_user_events.
+
+        Args:
+            event_data (dict): The event payload.
+            event_id (int): The id the event would get in the database.
+            created_at (datetime): The time the event would be stored.
+
+        Returns:
+            dict: The history event dictionary.
+        """
+        return {
+            "id": event_id,
+            "event_type": event_data["type"],
+            "amount": float(event_data["amount"]),
+            "event_time": event_data["time"],
+            "user_id": event_data["user_id"],
+            "created_at": created_at,
+        }
+
+    @staticmethod
+    def build_history(length, seed=0, end_time=None):
+        """
+        Build an in-memory history fixture of the given length.
+
+        Events are spaced one second apart and end at end_time, so the most
+        recent ones fall inside the 30 second deposit window.
+
+        Args:
+            length (int): The number of events in the history.
+            seed (int): The seed for the random generator.
+            end_time (datetime): The created_at time of the last event.
+
+        Returns:
+            list: A list of history event dictionaries, oldest first.
+        """
+        end_time = end_time or datetime.now()
+        stream = RuleProfiler.build_event_stream(length, seed)
+        return [
+            RuleProfiler.to_history_event(
+                event_data, index + 1, end_time - timedelta(seconds=length - index - 1)
+            )
+            for index, event_data in enumerate(stream)
+        ]
+
+    @staticmethod
+    def replay(stream, history, rule_names, call_rule):
+        """
+        Replay an event stream on top of a history fixture.
+
+        Each event is appended to the history before the rules run, the same
+        way the API inserts the event before calling get_Alerts.
+
+        Args:
+            stream (list): The event payloads to replay.
+            history (list): The history fixture, this list is not modified.
+            rule_names (list): The names of the rules to run.
+            call_rule (callable): Called with (name, rule, args) for every rule run.
+        """
+        history = list(history)
+        next_id = history[-1]["id"] + 1 if history else 1
+        for event_data in stream:
+            history.append(RuleProfiler.to_history_event(event_data, next_id, datetime.now()))
+            next_id += 1
+            for name in rule_names:
+                rule = RULES[name]
+                if rule.applies(event_data):
+                    call_rule(name, rule, rule.args(event_data, history))
+
+    @staticmethod
+    def profile_time(stream, history, rule_names, output_dir):
+        """
+        Profile each rule with cProfile and a stack tracer over a replay.
+
+        Writes <rule>.prof (pstats) and <rule>.time.folded (flamegraph folded
+        stacks in nanoseconds) into output_dir.
+
+        Returns:
+            dict: Per rule calls and total time in seconds.
+        """
+        profiles = {name: cProfile.Profile() for name in rule_names}
+        tracers = {name: StackTracer(name) for name in rule_names}
+        results = {name: {"calls": 0, "total_time_s": 0.0} for name in rule_names}
+
+        def call_with_cprofile(name, rule, args):
+            start = time.perf_counter()
+            profiles[name].runcall(rule.func, *args)
+            results[name]["total_time_s"] += time.perf_counter() - start
+            results[name]["calls"] += 1
+
+        def call_with_tracer(name, rule, args):
+            tracers[name].runcall(rule.func, *args)
+
+        RuleProfiler.replay(stream, history, rule_names, call_with_cprofile)
+        RuleProfiler.replay(stream, history, rule_names, call_with_tracer)
+
+        for name in rule_names:
+            profiles[name].dump_stats(os.path.join(output_dir, f"{name}.prof"))
+            write_folded(os.path.join(output_dir, f"{name}.time.folded"), tracers[name].folded)
+        return results
+
+    @staticmethod
+    def profile_memory(stream, history, rule_names, output_dir):
+        """
+        Measure allocations for each rule with tracemalloc over a replay.
+
+        Records the peak bytes allocated by every call, and writes
+        <rule>.alloc.folded with the bytes still live when the rule returns on
+        the final replayed event, which includes its local lists.
+
+        Returns:
+            dict: Per rule peak and mean peak allocation in bytes.
+        """
+        results = {
+            name: {"peak_alloc_bytes": 0, "total_peak_alloc_bytes": 0} for name in rule_names
+        }
+        last_args = {}
+
+        def call_with_tracemalloc(name, rule, args):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            rule.func(*args)
+            peak = tracemalloc.get_traced_memory()[1] - before
+            results[name]["peak_alloc_bytes"] = max(results[name]["peak_alloc_bytes"], peak)
+            results[name]["total_peak_alloc_bytes"] += peak
+            last_args[name] = args
+
+        tracemalloc.start(25)
+        try:
+            RuleProfiler.replay(stream, history, rule_names, call_with_tracemalloc)
+            for name in rule_names:
+                if name in last_args:
+                    folded = snapshot_at_return(RULES[name].func, last_args[name], name)
+                else:
+                    folded = {}
+                write_folded(os.path.join(output_dir, f"{name}.alloc.folded"), folded)
+        finally:
+            tracemalloc.stop()
+        return results
+
+    @staticmethod
+    def scaling_curves(rule_names, lengths, repeat=5, seed=0):
+        """
+        Time each rule against history fixtures of increasing length.
+
+        Args:
+            rule_names (list): The names of the rules to time.
+            lengths (list): The history lengths to time.
+            repeat (int): The number of timing repeats, the fastest is kept.
+            seed (int): The seed for the history fixtures.
+
+        Returns:
+            tuple: A list of (rule, length, ns per call) rows and a dict of the
+                fitted exponent k per rule, where time grows like n ** k.
+        """
+        rows = []
+        for length in lengths:
+            history = RuleProfiler.build_history(length, seed)
+            # Use a large withdrawal so the 1100 rule does all of its work
+            event_data = {"type": "withdraw", "amount": 150.0, "user_id": 1, "time": length}
+            for name in rule_names:
+                rule = RULES[name]
+                args = rule.args(event_data, history)
+                rows.append((name, length, time_per_call(rule.func, args, repeat)))
+
+        exponents = {}
+        for name in rule_names:
+            points = [
+                (math.log(length), math.log(ns))
+                for rule, length, ns in rows
+                if rule == name and ns > 0
+            ]
+            exponents[name] = fit_slope(points)
+        return rows, exponents
+
+    @staticmethod
+    def run(stream, history, rule_names, lengths, output_dir, repeat=5, seed=0):
+        """
+        Run every profiling pass and write the results to output_dir.
+
+        Returns:
+            dict: The summary that is also written to summary.json.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        # consecutive_deposits prints every step, keep it measured but quiet
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            timings = RuleProfiler.profile_time(stream, history, rule_names, output_dir)
+            memory = RuleProfiler.profile_memory(stream, history, rule_names, output_dir)
+            rows, exponents = RuleProfiler.scaling_curves(rule_names, lengths, repeat, seed)
+
+        with open(os.path.join(output_dir, "scaling.csv"), "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["rule", "history_length", "ns_per_call"])
+            writer.writerows(rows)
+
+        summary = {
+            "stream_length": len(stream),
+            "history_length": len(history),
+            "rules": {},
+        }
+        for name in rule_names:
+            calls = timings[name]["calls"]
+            summary["rules"][name] = {
+                "calls": calls,
+                "total_time_s": timings[name]["total_time_s"],
+                "mean_time_us": timings[name]["total_time_s"] / calls * 1e6 if calls else 0.0,
+                "peak_alloc_bytes": memory[name]["peak_alloc_bytes"],
+                "mean_peak_alloc_bytes": (
+                    memory[name]["total_peak_alloc_bytes"] / calls if calls else 0.0
+                ),
+                "scaling_exponent": exponents[name],
+            }
+        with open(os.path.join(output_dir, "summary.json"), "w") as file:
+            json.dump(summary, file, indent=2)
+        return summary
+
+
+class StackTracer:
+    """
+    Deterministic profile hook that records self time per call stack.
+
+    The stacks are kept in the folded format used by flamegraph.pl and
+    speedscope, with the rule name as the root frame.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.folded = defaultdict(int)
+        self.stack = []
+
+    def runcall(self, func, *args):
+        sys.setprofile(self.trace)
+        try:
+            return func(*args)
+        finally:
+            sys.setprofile(None)
+            self.stack = []
+
+    def trace(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if event == "call":
+            code = frame.f_code
+            self.stack.append(
+                [
+                    f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}",
+                    now,
+                    0,
+                ]
+            )
+        elif event == "c_call":
+            self.stack.append([getattr(arg, "__qualname__", repr(arg)), now, 0])
+        elif event in ("return", "c_return", "c_exception") and self.stack:
+            name, start, child_time = self.stack.pop()
+            elapsed = now - start
+            key = ";".join([self.root] + [entry[0] for entry in self.stack] + [name])
+            self.folded[key] += elapsed - child_time
+            if self.stack:
+                self.stack[-1][2] += elapsed
+
+
+def snapshot_at_return(func, args, root):
+    """
+    Run func and collect the bytes still allocated when it returns.
+
+    The snapshot is taken from the return event, before the frame's locals are
+    released, so intermediate lists built by the rule are included.
+
+    Returns:
+        dict: Folded allocation stacks mapped to bytes.
+    """
+    code = func.__code__
+    snapshots = []
+
+    def hook(frame, event, arg):
+        if event == "return" and frame.f_code is code and not snapshots:
+            snapshots.append(tracemalloc.take_snapshot())
+
+    before = tracemalloc.take_snapshot()
+    sys.setprofile(hook)
+    try:
+        func(*args)
+    finally:
+        sys.setprofile(None)
+    after = snapshots[0] if snapshots else tracemalloc.take_snapshot()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    folded = defaultdict(int)
+    for stat in after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        frames = list(stat.traceback)
+        # Drop the profiler frames above the rule itself
+        start = next(
+            (index for index, frame in enumerate(frames) if frame.filename == code.co_filename),
+            None,
+        )
+        if start is None:
+            continue
+        key = ";".join(
+            [root]
+            + [f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in frames[start:]]
+        )
+        folded[key] += stat.size_diff
+    return folded
+
+
+def time_per_call(func, args, repeat):
+    """
+    Return the fastest nanoseconds per call of func over repeat runs.
+    """
+    # Grow the loop count until one run takes at least a millisecond
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= 1_000_000 or number >= 1_000_000:
+            break
+        number *= 10
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def fit_slope(points):
+    """
+    Least squares slope of (x, y) points, or None with fewer than two points.
+    """
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def write_folded(path, folded):
+    """
+    Write folded stacks as "frame;frame;frame count" lines.
+    """
+    with open(path, "w") as file:
+        for key, value in sorted(folded.items()):
+            if value > 0:
+                file.write(f"{key} {int(value)}\n")
+
+
+def print_summary(summary):
+    print(
+        f"Replayed {summary['stream_length']} events "
+        f"on a history of {summary['history_length']} events"
+    )
+    print(
+        f"{'rule':<36}{'calls':>8}{'total s':>12}{'mean us':>12}{'peak bytes':>14}{'~O(n^k)':>10}"
+    )
+    for name, result in summary["rules"].items():
+        exponent = result["scaling_exponent"]
+        print(
+            f"{name:<36}{result['calls']:>8}{result['total_time_s']:>12.4f}"
+            f"{result['mean_time_us']:>12.2f}{result['peak_alloc_bytes']:>14}"
+            f"{'-' if exponent is None else f'{exponent:.2f}':>10}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the UserEvents alert rules.")
+    parser.add_argument("--events", help="JSON file with a recorded list of event payloads")
+    parser.add_argument("--stream-length", type=int, default=200)
+    parser.add_argument("--history-length", type=int, default=1000)
+    parser.add_argument(
+        "--lengths",
+        type=lambda value: [int(length) for length in value.split(",")],
+        default=DEFAULT_LENGTHS,
+        help="Comma separated history lengths for the scaling curves",
+    )
+    parser.add_argument("--rules", nargs="+", choices=list(RULES), default=list(RULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="profile_output")
+    options = parser.parse_args(argv)
+
+    if options.events:
+        stream = RuleProfiler.load_event_stream(options.events)
+    else:
+        stream = RuleProfiler.build_event_stream(options.stream_length, options.seed + 1)
+    history = RuleProfiler.build_history(options.history_length, options.seed)
+
+    summary = RuleProfiler.run(
+        stream,
+        history,
+        options.rules,
+        options.lengths,
+        options.output,
+        options.repeat,
+        options.seed,
+    )
+    print_summary(summary)
+    print(f"Profiles written to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
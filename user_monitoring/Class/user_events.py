@@ -92,8 +92,8 @@ class UserEvents:
         events = UserEvents.get_user_events(event_data["user_id"])
 
         # Check for large withdrawal amount
-        # Needed to convert amount string to float
-        if event_data["type"] == "withdraw" and float(event_data["amount"]) > 100:
+        alertCode = UserEvents.withdrawal_greater_than_hundred(event_data)
+        if alertCode is not None:
             alert_codes.append(AlertCodes.WITHDRAWAL_GREATER_THAN_HUNDRED.value)
         # Check for three consecutive withdrawals
         alertCode = UserEvents.consecutive_withdrawals(events)
@@ -143,6 +143,21 @@ class UserEvents:
         ]
         return event_list
 
+    @staticmethod
+    def withdrawal_greater_than_hundred(event_data):
+        """
+        Check if the incoming event is a withdrawal of more than 100.
+
+        Args:
+            event_data (dict): A dictionary containing the event data.
+
+        Returns:
+            int: The alert code if the withdrawal is greater than 100.
+        """
+        # Needed to convert amount string to float
+        if event_data["type"] == "withdraw" and float(event_data["amount"]) > 100:
+            return 1100
+
     @staticmethod
     def consecutive_withdrawals(events):
         """